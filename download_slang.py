@@ -4,55 +4,80 @@ Script to download Gen Z slang dataset using pandas and save to JSON file
 """
 
 import pandas as pd
-import json
+import orjson
 import os
 
+# Rows per CSV chunk when streaming the dataset
+CHUNK_SIZE = 50_000
+
+def save_json(path, data):
+    """Write data as indented UTF-8 JSON straight from orjson's bytes"""
+    with open(path, 'wb') as f:
+        f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+
+def coalesce_columns(df, columns):
+    """Return the first non-null value per row across whichever columns exist"""
+    present = [col for col in columns if col in df.columns]
+    if not present:
+        return None
+    
+    series = df[present[0]]
+    for col in present[1:]:
+        series = series.where(series.notna(), df[col])
+    return series
+
+def extract_slang_pairs(df):
+    """Return parallel lists of cleaned slang terms and meanings from a chunk"""
+    # Handle different possible column names
+    possible_slang_columns = ['slang', 'term', 'word', 'phrase']
+    possible_meaning_columns = ['meaning', 'definition', 'explanation', 'description']
+    
+    slang_series = coalesce_columns(df, possible_slang_columns)
+    meaning_series = coalesce_columns(df, possible_meaning_columns)
+    
+    if slang_series is None or meaning_series is None:
+        return [], []
+    
+    found = slang_series.notna() & meaning_series.notna()
+    slang_series = slang_series[found].astype(str).str.strip().str.lower()
+    meaning_series = meaning_series[found].astype(str).str.strip()
+    
+    # Keep only rows where we found both slang term and meaning
+    keep = (slang_series != '') & (meaning_series != '')
+    return slang_series[keep].tolist(), meaning_series[keep].tolist()
+
 def download_slang_dataset():
     try:
         print("Downloading Gen Z slang dataset...")
         
-        # Load the dataset using pandas
-        df = pd.read_csv("hf://datasets/MLBtrio/genz-slang-dataset/all_slangs.csv")
+        # Stream the dataset in chunks so peak memory stays bounded
+        reader = pd.read_csv("hf://datasets/MLBtrio/genz-slang-dataset/all_slangs.csv", chunksize=CHUNK_SIZE)
         
-        print(f"Dataset loaded! Shape: {df.shape}")
-        print(f"Columns: {df.columns.tolist()}")
+        slang_terms = []
+        meanings = []
+        total_rows = 0
+        
+        for df in reader:
+            if total_rows == 0:
+                print(f"Columns: {df.columns.tolist()}")
+                
+                # Show first few rows
+                print("\nFirst 5 rows:")
+                print(df.head())
+            
+            total_rows += len(df)
+            chunk_terms, chunk_meanings = extract_slang_pairs(df)
+            slang_terms.extend(chunk_terms)
+            meanings.extend(chunk_meanings)
         
-        # Show first few rows
-        print("\nFirst 5 rows:")
-        print(df.head())
+        print(f"\nDataset loaded! Rows: {total_rows}")
         
-        # Clean and process the data
-        slang_data = []
-        slang_terms = []
-        slang_meanings = {}
+        slang_data = [{'slang': term, 'meaning': meaning} for term, meaning in zip(slang_terms, meanings)]
+        slang_meanings = dict(zip(slang_terms, meanings))
         
-        for index, row in df.iterrows():
-            # Handle different possible column names
-            slang_term = None
-            meaning = None
-            
-            # Try different column names that might contain slang terms
-            possible_slang_columns = ['slang', 'term', 'word', 'phrase']
-            possible_meaning_columns = ['meaning', 'definition', 'explanation', 'description']
-            
-            for col in possible_slang_columns:
-                if col in df.columns and pd.notna(row[col]):
-                    slang_term = str(row[col]).strip().lower()
-                    break
-            
-            for col in possible_meaning_columns:
-                if col in df.columns and pd.notna(row[col]):
-                    meaning = str(row[col]).strip()
-                    break
-            
-            # If we found both slang term and meaning, add them
-            if slang_term and meaning and slang_term != '' and meaning != '':
-                slang_data.append({
-                    'slang': slang_term,
-                    'meaning': meaning
-                })
-                slang_terms.append(slang_term)
-                slang_meanings[slang_term] = meaning
+        # Terms are unique (first-seen order), so 'meanings' doubles as the
+        # O(1) lookup table and 'terms' can be sampled without duplicates
+        slang_terms = list(slang_meanings)
         
         print(f"\nProcessed {len(slang_terms)} slang terms")
         print(f"Sample terms: {slang_terms[:10]}")
@@ -67,8 +92,7 @@ def download_slang_dataset():
         
         # Save to the same directory as the script
         output_file = 'slang_data.json'
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(output_data, f, indent=2, ensure_ascii=False)
+        save_json(output_file, output_data)
         
         print(f"\n✅ Slang data saved to {output_file}")
         print(f"📊 Total terms saved: {len(slang_terms)}")
@@ -200,8 +224,7 @@ def download_slang_dataset():
         }
         
         output_file = 'slang_data.json'
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(output_data, f, indent=2, ensure_ascii=False)
+        save_json(output_file, output_data)
         
         print(f"✅ Fallback slang data saved to {output_file}")
         print(f"📊 Total terms saved: {len(slang_terms)}")
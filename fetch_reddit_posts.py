@@ -4,14 +4,173 @@ Enhanced script to fetch real Reddit posts AND real comments
 Scrapes authentic discussions for your research simulation
 """
 
-import json
-import urllib.request
-import urllib.parse
+import argparse
+import asyncio
+import hashlib
+import itertools
+import os
+import re
 import time
 import random
 from datetime import datetime, timedelta
+from html import unescape
 
-def fetch_reddit_posts_and_comments():
+import aiohttp
+import orjson
+
+USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
+
+# Concurrency and politeness limits for Reddit's public API
+MAX_CONNECTIONS = 10
+REQUEST_TIMEOUT = 10  # seconds
+REQUESTS_PER_MINUTE = 60
+
+# Image file extension at the end of a URL path
+IMAGE_URL_RE = re.compile(r'\.(?:jpe?g|png|gif|webp)(?:[?#]|$)', re.IGNORECASE)
+
+# Markdown bold/italic markers stripped from comments
+MARKDOWN_RE = re.compile(r'\*+')
+
+# Bodies Reddit substitutes for deleted/removed content
+DELETED_TEXTS = frozenset(['[deleted]', '[removed]'])
+
+# Any whitespace that ' '.join(text.split()) would change: non-space
+# whitespace, doubled spaces, or a leading/trailing space
+MESSY_WHITESPACE_RE = re.compile(r'[^\S ]| {2}|^ | $')
+WHITESPACE_RE = re.compile(r'\s+')
+
+# Maximum characters kept from post and comment bodies
+MAX_POST_TEXT_LENGTH = 500
+MAX_COMMENT_TEXT_LENGTH = 300
+
+# Relative post/comment times are measured from the start of the run
+RUN_STARTED = int(time.time())
+
+# Raw API responses are cached on disk so reruns skip the network
+CACHE_DIR = os.path.join('.cache', 'reddit')
+CACHE_TTL = 3600  # seconds
+
+# Reddit only compresses its JSON when asked; aiohttp decodes it transparently
+REQUEST_HEADERS = {
+    'User-Agent': USER_AGENT,
+    'Accept-Encoding': 'gzip, deflate',
+}
+
+class RateLimiter:
+    """Token bucket shared by all fetch coroutines"""
+    
+    def __init__(self, calls, period):
+        self.capacity = calls
+        self.tokens = calls
+        self.rate = calls / period
+        self.last = time.monotonic()
+    
+    async def acquire(self):
+        """Wait until a request token is available"""
+        # No lock needed: nothing awaits between the check and the decrement
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+rate_limiter = RateLimiter(REQUESTS_PER_MINUTE, 60)
+
+def cache_path(url):
+    """Location of the cached response for a URL"""
+    return os.path.join(CACHE_DIR, hashlib.sha256(url.encode()).hexdigest() + '.json')
+
+async def fetch_json(session, url, refresh=False):
+    """Fetch a Reddit JSON endpoint, respecting the shared rate limit and disk cache"""
+    path = cache_path(url)
+    
+    if not refresh:
+        try:
+            if time.time() - os.path.getmtime(path) < CACHE_TTL:
+                with open(path, 'rb') as f:
+                    return orjson.loads(f.read())
+        except (OSError, orjson.JSONDecodeError):
+            pass
+    
+    await rate_limiter.acquire()
+    
+    async with session.get(url) as response:
+        response.raise_for_status()
+        body = await response.read()
+    
+    # orjson parses the raw bytes directly, no intermediate str
+    data = orjson.loads(body)
+    
+    # Write via a temp file so an interrupted run never leaves a partial response
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(body)
+    os.replace(tmp_path, path)
+    
+    return data
+
+def save_json(path, data):
+    """Write data as indented UTF-8 JSON straight from orjson's bytes"""
+    # Comments are keyed by our integer post IDs
+    with open(path, 'wb') as f:
+        f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+
+def write_jsonl(f, record):
+    """Append one record to an open binary JSON Lines file"""
+    f.write(orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE))
+
+async def fetch_subreddit_posts(session, subreddit, refresh=False):
+    """Fetch the top hot posts for a subreddit, skipping removed/deleted ones"""
+    # Reddit's public JSON API endpoint
+    url = f"https://www.reddit.com/r/{subreddit}/hot.json?limit=10"
+    data = await fetch_json(session, url, refresh)
+    
+    posts = []
+    if 'data' in data and 'children' in data['data']:
+        for post_data in data['data']['children'][:3]:  # Take top 3 from each subreddit to get comments too
+            post = post_data['data']
+            
+            # Skip removed/deleted posts
+            if post.get('removed_by_category') or post.get('title') == '[deleted]':
+                continue
+            
+            posts.append(post)
+    
+    return posts
+
+async def fetch_subreddit(session, subreddit, refresh=False):
+    """Fetch a subreddit's posts, then all of their comment threads concurrently"""
+    posts = await fetch_subreddit_posts(session, subreddit, refresh)
+    print(f"📡 Fetched {len(posts)} posts from r/{subreddit}")
+    
+    comment_fetches = [
+        (post['id'], fetch_post_comments(session, subreddit, post['id'], post['permalink'], refresh))
+        for post in posts
+        if post.get('id') and post.get('permalink')
+    ]
+    results = await asyncio.gather(*(fetch for _, fetch in comment_fetches))
+    
+    # Comments are keyed by Reddit ID until our own IDs are assigned
+    return posts, {reddit_id: comments for (reddit_id, _), comments in zip(comment_fetches, results)}
+
+async def fetch_all_subreddits(subreddits, refresh=False):
+    """Fetch every subreddit concurrently over one pooled keep-alive session"""
+    connector = aiohttp.TCPConnector(limit=MAX_CONNECTIONS)
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+    
+    async with aiohttp.ClientSession(headers=REQUEST_HEADERS, connector=connector, timeout=timeout) as session:
+        return await asyncio.gather(
+            *(fetch_subreddit(session, subreddit, refresh) for subreddit in subreddits),
+            return_exceptions=True
+        )
+
+def fetch_reddit_posts_and_comments(refresh=False):
     try:
         print("🚀 Fetching real Reddit posts AND comments...")
         
@@ -48,76 +207,56 @@ def fetch_reddit_posts_and_comments():
         all_comments = {}  # Store comments by post ID
         post_id_counter = 1
         
-        for subreddit in subreddits:
-            print(f"📡 Fetching from r/{subreddit}...")
-            
-            try:
-                # Reddit's public JSON API endpoint
-                url = f"https://www.reddit.com/r/{subreddit}/hot.json?limit=10"
-                
-                # Set a user agent (required by Reddit)
-                req = urllib.request.Request(url)
-                req.add_header('User-Agent', 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36')
-                
-                # Fetch the data
-                with urllib.request.urlopen(req) as response:
-                    data = json.loads(response.read().decode())
-                
-                # Process the posts
-                if 'data' in data and 'children' in data['data']:
-                    for post_data in data['data']['children'][:3]:  # Take top 3 from each subreddit to get comments too
-                        post = post_data['data']
-                        
-                        # Skip removed/deleted posts
-                        if post.get('removed_by_category') or post.get('title') == '[deleted]':
-                            continue
-                        
-                        # Get the Reddit ID for fetching comments
-                        reddit_id = post.get('id', '')
-                        permalink = post.get('permalink', '')
-                        
-                        # Convert Reddit post to our format
-                        processed_post = {
-                            'id': post_id_counter,
-                            'subreddit': subreddit,
-                            'title': post.get('title', ''),
-                            'author': post.get('author', 'unknown_user'),
-                            'time': convert_reddit_time(post.get('created_utc', 0)),
-                            'upvotes': post.get('ups', 0),
-                            'comments': post.get('num_comments', 0),
-                            'text': clean_text(post.get('selftext', '')),
-                            'url': post.get('url', ''),
-                            'type': determine_post_type(post),
-                            'image': get_image_url(post),
-                            'reddit_id': reddit_id,
-                            'reddit_permalink': f"https://reddit.com{permalink}"
-                        }
-                        
-                        all_posts.append(processed_post)
-                        
-                        print(f"   ✅ {processed_post['title'][:60]}...")
-                        
-                        # Fetch real comments for this post
-                        if reddit_id and permalink:
-                            print(f"   💬 Fetching comments...")
-                            comments = fetch_post_comments(subreddit, reddit_id, permalink)
-                            if comments:
-                                all_comments[post_id_counter] = comments
-                                print(f"   💬 Got {len(comments)} comments")
-                            else:
-                                print(f"   💬 No comments found")
-                        
-                        post_id_counter += 1
-                        
-                        # Be extra nice to Reddit's servers when fetching comments
-                        time.sleep(2)
-                
-                # Pause between subreddits
-                time.sleep(1)
-                
-            except Exception as e:
-                print(f"   ❌ Error fetching r/{subreddit}: {e}")
+        # Fetch listings and comment threads concurrently; the shared rate
+        # limiter keeps us polite to Reddit's servers
+        listings = {}
+        fetched_comments = {}
+        
+        results = asyncio.run(fetch_all_subreddits(subreddits, refresh))
+        for subreddit, result in zip(subreddits, results):
+            if isinstance(result, Exception):
+                print(f"   ❌ Error fetching r/{subreddit}: {result}")
                 continue
+            
+            listings[subreddit], comments_by_reddit_id = result
+            fetched_comments.update(comments_by_reddit_id)
+        
+        # Posts and comments are also streamed out as JSON Lines while they
+        # are processed, so consumers can iterate without loading everything
+        # Posts reference their subreddit by index into the 'subreddits' list
+        # Assign IDs in subreddit order so output is stable across runs
+        with open('reddit_posts.jsonl', 'wb') as posts_jsonl, open('reddit_comments.jsonl', 'wb') as comments_jsonl:
+            for subreddit_index, subreddit in enumerate(subreddits):
+                for post in listings.get(subreddit, []):
+                    # Get the Reddit ID for fetching comments
+                    reddit_id = post.get('id', '')
+                    permalink = post.get('permalink', '')
+                    url = post.get('url', '')
+                    selftext = post.get('selftext', '')
+                    post_type, image = classify_post(post, url, selftext, permalink)
+                    
+                    # Convert Reddit post to our format
+                    processed_post = map_post(
+                        post, post_id_counter, subreddit_index, reddit_id,
+                        url, selftext, permalink, post_type, image
+                    )
+                    
+                    all_posts.append(processed_post)
+                    write_jsonl(posts_jsonl, {**processed_post, 'subreddit': subreddit})
+                    
+                    print(f"   ✅ {processed_post['title'][:60]}...")
+                    
+                    comments = fetched_comments.get(reddit_id)
+                    if comments:
+                        all_comments[post_id_counter] = comments
+                        write_jsonl(comments_jsonl, {'post_id': post_id_counter, 'comments': comments})
+                        print(f"   💬 Got {len(comments)} comments")
+                    else:
+                        print(f"   💬 No comments found")
+                    
+                    post_id_counter += 1
+        
+        posts_by_id = {post['id']: post for post in all_posts}
         
         print(f"\n📊 Successfully fetched {len(all_posts)} posts with real comments!")
         print(f"💬 Got comments for {len(all_comments)} posts")
@@ -132,10 +271,9 @@ def fetch_reddit_posts_and_comments():
         }
         
         output_file = 'reddit_posts.json'
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(output_data, f, indent=2, ensure_ascii=False)
+        save_json(output_file, output_data)
         
-        print(f"✅ Posts and comments saved to {output_file}")
+        print(f"✅ Posts and comments saved to {output_file} (+ reddit_posts.jsonl, reddit_comments.jsonl)")
         
         # Create a detailed summary file
         summary_file = 'posts_summary.txt'
@@ -149,14 +287,16 @@ def fetch_reddit_posts_and_comments():
             
             f.write("Posts Overview:\n")
             f.write("===============\n")
-            for post in all_posts:
-                comment_count = len(all_comments.get(post['id'], []))
-                f.write(f"r/{post['subreddit']} - {post['title'][:80]}... ({comment_count} comments)\n")
+            comment_counts = {post_id: len(comments) for post_id, comments in all_comments.items()}
+            f.writelines(
+                f"r/{subreddits[post['sub']]} - {post['title'][:80]}... ({comment_counts.get(post['id'], 0)} comments)\n"
+                for post in all_posts
+            )
             
             f.write(f"\nSample Comments:\n")
             f.write(f"================\n")
-            for post_id, comments in list(all_comments.items())[:3]:
-                post = next((p for p in all_posts if p['id'] == post_id), None)
+            for post_id, comments in itertools.islice(all_comments.items(), 3):
+                post = posts_by_id.get(post_id)
                 if post:
                     f.write(f"\nPost: {post['title'][:60]}...\n")
                     for i, comment in enumerate(comments[:2]):
@@ -183,23 +323,25 @@ def fetch_reddit_posts_and_comments():
         }
         
         output_file = 'reddit_posts.json'
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(output_data, f, indent=2, ensure_ascii=False)
+        save_json(output_file, output_data)
+        
+        # Keep the JSON Lines files in step with the fallback data
+        with open('reddit_posts.jsonl', 'wb') as f:
+            for post in fallback_posts:
+                write_jsonl(f, post)
+        with open('reddit_comments.jsonl', 'wb') as f:
+            for post_id, comments in fallback_comments.items():
+                write_jsonl(f, {'post_id': post_id, 'comments': comments})
         
         print(f"✅ Fallback posts saved to {output_file}")
         return True
 
-def fetch_post_comments(subreddit, reddit_id, permalink):
+async def fetch_post_comments(session, subreddit, reddit_id, permalink, refresh=False):
     """Fetch real comments for a specific Reddit post"""
     try:
         # Reddit comments API endpoint
         comments_url = f"https://www.reddit.com{permalink}.json"
-        
-        req = urllib.request.Request(comments_url)
-        req.add_header('User-Agent', 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36')
-        
-        with urllib.request.urlopen(req) as response:
-            data = json.loads(response.read().decode())
+        data = await fetch_json(session, comments_url, refresh)
         
         comments = []
         
@@ -210,11 +352,12 @@ def fetch_post_comments(subreddit, reddit_id, permalink):
                     comment = comment_data['data']
                     
                     # Skip deleted/removed comments
-                    if comment.get('body') in ['[deleted]', '[removed]', None]:
+                    body = comment.get('body')
+                    if body is None or body in DELETED_TEXTS:
                         continue
                     
                     # Clean and format the comment
-                    comment_text = clean_comment_text(comment.get('body', ''))
+                    comment_text = clean_comment_text(body)
                     if comment_text and len(comment_text) > 10:  # Skip very short comments
                         processed_comment = {
                             'author': comment.get('author', 'unknown_user'),
@@ -231,21 +374,27 @@ def fetch_post_comments(subreddit, reddit_id, permalink):
         print(f"     ❌ Error fetching comments: {e}")
         return []
 
+def collapse_whitespace(text):
+    """Collapse whitespace runs to single spaces and trim the ends"""
+    # Most titles/comments are already clean, so skip the rewrite when possible
+    if MESSY_WHITESPACE_RE.search(text):
+        text = WHITESPACE_RE.sub(' ', text).strip()
+    return text
+
 def clean_comment_text(text):
     """Clean Reddit comment text"""
-    if not text or text in ['[deleted]', '[removed]']:
+    if not text or text in DELETED_TEXTS:
         return ""
     
-    # Remove markdown formatting
-    text = text.replace('**', '').replace('*', '').replace('&gt;', '>')
-    text = text.replace('&lt;', '<').replace('&amp;', '&')
+    # Remove markdown formatting, then decode HTML entities (&gt;, &amp;, ...)
+    text = unescape(MARKDOWN_RE.sub('', text))
     
     # Remove excessive newlines and spaces
-    text = ' '.join(text.split())
+    text = collapse_whitespace(text)
     
     # Truncate if too long
-    if len(text) > 300:
-        text = text[:300] + "..."
+    if len(text) > MAX_COMMENT_TEXT_LENGTH:
+        text = text[:MAX_COMMENT_TEXT_LENGTH] + "..."
     
     return text
 
@@ -255,18 +404,14 @@ def convert_reddit_time(utc_timestamp):
         return f"{random.randint(1, 6)} hours ago"
         
     try:
-        post_time = datetime.fromtimestamp(utc_timestamp)
-        now = datetime.now()
-        diff = now - post_time
+        diff = RUN_STARTED - int(utc_timestamp)
         
-        if diff.days > 0:
-            return f"{diff.days} days ago"
-        elif diff.seconds > 3600:
-            hours = diff.seconds // 3600
-            return f"{hours} hours ago"
-        elif diff.seconds > 60:
-            minutes = diff.seconds // 60
-            return f"{minutes} minutes ago"
+        if diff >= 86400:
+            return f"{diff // 86400} days ago"
+        elif diff > 3600:
+            return f"{diff // 3600} hours ago"
+        elif diff > 60:
+            return f"{diff // 60} minutes ago"
         else:
             return "just now"
     except:
@@ -274,47 +419,73 @@ def convert_reddit_time(utc_timestamp):
 
 def clean_text(text):
     """Clean and truncate Reddit post text"""
-    if not text or text in ['[deleted]', '[removed]']:
+    if not text or text in DELETED_TEXTS:
         return ""
     
     # Remove excessive newlines and spaces
-    text = ' '.join(text.split())
+    text = collapse_whitespace(text)
     
     # Truncate if too long
-    if len(text) > 500:
-        text = text[:500] + "..."
+    if len(text) > MAX_POST_TEXT_LENGTH:
+        text = text[:MAX_POST_TEXT_LENGTH] + "..."
     
     return text
 
-def determine_post_type(post):
-    """Determine if post is text, image, or link"""
-    url = post.get('url', '')
-    selftext = post.get('selftext', '')
+def classify_post(post, url, selftext, permalink):
+    """Determine if post is text, image, or link, and extract its image URL"""
+    # One regex scan serves both the type and the image URL
+    if IMAGE_URL_RE.search(url):
+        return ("text" if selftext else "image"), url
     
     if selftext:
-        return "text"
-    elif any(ext in url.lower() for ext in ['.jpg', '.jpeg', '.png', '.gif', '.webp']):
-        return "image"
-    elif url and url != post.get('permalink', ''):
-        return "link"
+        post_type = "text"
+    elif url and url != permalink:
+        post_type = "link"
     else:
-        return "text"
-
-def get_image_url(post):
-    """Extract image URL if post is an image"""
-    url = post.get('url', '')
-    
-    if any(ext in url.lower() for ext in ['.jpg', '.jpeg', '.png', '.gif', '.webp']):
-        return url
+        post_type = "text"
     
     # Check for Reddit gallery or preview images
+    image = None
     if 'preview' in post and 'images' in post['preview']:
         try:
-            return post['preview']['images'][0]['source']['url'].replace('&amp;', '&')
+            image = post['preview']['images'][0]['source']['url'].replace('&amp;', '&')
         except:
             pass
     
-    return None
+    return post_type, image
+
+# Output fields of a processed post, in order, as Python expressions over
+# map_post's arguments (get is the Reddit post's .get)
+POST_FIELDS = (
+    ('id', "post_id"),
+    ('sub', "sub"),
+    ('title', "get('title', '')"),
+    ('author', "get('author', 'unknown_user')"),
+    ('time', "convert_reddit_time(get('created_utc', 0))"),
+    ('upvotes', "get('ups', 0)"),
+    ('comments', "get('num_comments', 0)"),
+    ('text', "clean_text(selftext)"),
+    ('url', "url"),
+    ('type', "post_type"),
+    ('image', "image"),
+    ('reddit_id', "reddit_id"),
+    ('reddit_permalink', "'https://reddit.com' + permalink"),
+)
+
+def build_post_mapper(fields):
+    """Compile a straight-line function that builds a processed post dict"""
+    entries = ''.join(f"\n        {key!r}: {expr}," for key, expr in fields)
+    source = (
+        "def map_post(post, post_id, sub, reddit_id, url, selftext, permalink, post_type, image):\n"
+        "    get = post.get\n"
+        f"    return {{{entries}\n    }}\n"
+    )
+    
+    namespace = {'convert_reddit_time': convert_reddit_time, 'clean_text': clean_text}
+    exec(compile(source, '<map_post>', 'exec'), namespace)
+    return namespace['map_post']
+
+map_post = build_post_mapper(POST_FIELDS)
 
 def create_fallback_posts():
     """Create interesting fallback posts if Reddit API fails"""
@@ -399,18 +570,23 @@ def create_fallback_comments():
     }
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch real Reddit posts and comments")
+    parser.add_argument('--refresh', action='store_true', help="ignore cached Reddit responses and refetch everything")
+    args = parser.parse_args()
+    
     print("🌐 Enhanced Reddit Posts & Comments Fetcher")
     print("=" * 50)
     print("📡 Fetching real posts AND real comments...")
     print("🔬 Perfect for authentic research demonstrations!")
     print("")
     
-    success = fetch_reddit_posts_and_comments()
+    success = fetch_reddit_posts_and_comments(refresh=args.refresh)
     
     if success:
         print("\n🎉 Success! Real Reddit posts and comments are ready!")
         print("📁 Files created:")
         print("   - reddit_posts.json (posts + real comments)")
+        print("   - reddit_posts.jsonl / reddit_comments.jsonl (one record per line)")
         print("   - posts_summary.txt (detailed overview)")
         print("")
         print("🚀 Now update your server.js to use the real comments!")
@@ -308,7 +308,11 @@ function loadRedditPostsAndComments() {
         const data = JSON.parse(fileContent);
         
         // Extract the posts and comments
-        redditPosts = data.posts || [];
+        // Posts store their subreddit as an index into data.subreddits
+        const subredditNames = data.subreddits || [];
+        redditPosts = (data.posts || []).map(post =>
+            post.subreddit === undefined ? { ...post, subreddit: subredditNames[post.sub] } : post
+        );
         realComments = data.comments || {}; // Real Reddit comments!
         
         console.log(`✅ Loaded ${redditPosts.length} real Reddit posts from local file`);